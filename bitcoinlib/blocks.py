@@ -18,14 +18,136 @@
 #    along with this program.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import hashlib
+import struct
 from io import BytesIO
+import numpy as np
 from bitcoinlib.encoding import *
 from bitcoinlib.networks import Network
 from bitcoinlib.transactions import Transaction
 
+_U32LE = struct.Struct('<L')
+_U64LE = struct.Struct('<Q')
+_BLOCK_HEADER = struct.Struct('<L32s32sLLL')
+_DIFF_1_TARGET = 0xffff << (8 * (0x1d - 3))
+
+# Version bits signaled with BIP9 versioning
+_BIP9_BITS = (
+    (0, 'BIP68'),   # BIP112 (CHECKSEQUENCEVERIFY), BIP113 - Relative lock-time using consensus-enforced sequence numbers
+    (1, 'BIP141'),  # BIP143, BIP147 (Segwit)
+    (4, 'BIP91'),   # Segwit?
+)
+# Block versions before BIP9 versioning
+_LEGACY_VERSION_BIPS = {
+    2: 'BIP34',           # Version 2: Block Height in Coinbase
+    3: 'BIP66',           # Version 3: Strict DER signatures
+    4: 'BIP65',           # Version 4: Introduce CHECKLOCKTIMEVERIFY
+    0x30000000: 'BIP109',  # Increase block size 2MB (rejected)
+    0x20000007: 'BIP101',  # Increase block size 8MB (rejected)
+}
+
+
+def calc_merkle_root(txids):
+    """
+    Calculate merkle root from a list of transaction IDs.
+
+    Transaction IDs are hashed in pairs, level by level, until one hash remains. If a level contains an odd number
+    of hashes the last hash is paired with itself.
+
+    >>> calc_merkle_root(['4a5e1e4baab89f3a32518a88c31bc87f618f76673e2cc77ab2127b7afdeda33b']).hex()
+    '4a5e1e4baab89f3a32518a88c31bc87f618f76673e2cc77ab2127b7afdeda33b'
+
+    :param txids: List of transaction IDs in the order they appear in the block
+    :type txids: list of bytes, list of str
+
+    :return bytes:
+    """
+    if not txids:
+        return b''
+    hashes = [(bytes.fromhex(txid) if isinstance(txid, str) else txid)[::-1] for txid in txids]
+    while len(hashes) > 1:
+        if len(hashes) % 2:
+            hashes.append(hashes[-1])
+        hashes = [double_sha256(left + right) for left, right in zip(hashes[0::2], hashes[1::2])]
+    return hashes[0][::-1]
+
+
+def _ensure_bytes(value, size):
+    """
+    Return value unchanged if it is a bytes object of the expected size, otherwise convert it with :func:`to_bytes`.
+    Avoids the hexadecimal string detection of to_bytes for values which are already raw bytes.
+    """
+    if type(value) is bytes and len(value) == size:
+        return value
+    return to_bytes(value)
+
+
+def _scan_tx_offsets(raw, pos, count):
+    """
+    Walk through serialized transactions in a buffer and return offset and size of each transaction. Only the
+    length fields are read, no Transaction objects are created.
+
+    :param raw: Buffer with serialized transactions
+    :type raw: bytes
+    :param pos: Position of first transaction in buffer
+    :type pos: int
+    :param count: Number of transactions to scan
+    :type count: int
+
+    :return list of (int, int):
+    """
+    offsets = []
+    raw_len = len(raw)
+    pos_start = pos
+    try:
+        for _ in range(count):
+            pos_start = pos
+            pos += 4
+            segwit = False
+            if raw[pos] == 0:
+                segwit = raw[pos + 1] == 1
+                pos += 2
+            n_inputs, size = varbyteint_to_int(raw[pos:pos + 9])
+            pos += size
+            for _ in range(n_inputs):
+                script_size, size = varbyteint_to_int(raw[pos + 36:pos + 45])
+                pos += 36 + size + script_size + 4
+                if pos > raw_len:
+                    raise IndexError
+            n_outputs, size = varbyteint_to_int(raw[pos:pos + 9])
+            pos += size
+            for _ in range(n_outputs):
+                script_size, size = varbyteint_to_int(raw[pos + 8:pos + 17])
+                pos += 8 + size + script_size
+                if pos > raw_len:
+                    raise IndexError
+            if segwit:
+                for _ in range(n_inputs):
+                    n_items, size = varbyteint_to_int(raw[pos:pos + 9])
+                    pos += size
+                    if pos > raw_len:
+                        raise IndexError
+                    for _ in range(n_items):
+                        item_size, size = varbyteint_to_int(raw[pos:pos + 9])
+                        pos += size + item_size
+                        if pos > raw_len:
+                            raise IndexError
+            pos += 4
+            if pos > raw_len:
+                raise IndexError
+            offsets.append((pos_start, pos - pos_start))
+    except IndexError:
+        raise ValueError("Transaction data incomplete, transaction at position %d exceeds data size" % pos_start)
+    return offsets
+
 
 class Block:
 
+    __slots__ = ('block_hash', 'version', 'version_int', 'prev_block', 'merkle_root', 'time', 'bits', 'bits_int',
+                 'nonce', 'nonce_int', 'transactions', 'transactions_dict', 'txs_data', 'confirmations', 'network',
+                 'tx_count', 'page', 'limit', 'height', 'total_in', 'total_out', 'size', 'tx_sizes', 'tx_vsizes',
+                 'tx_fees', 'tx_output_totals', '_target', '_target_bits')
+
     def __init__(self, block_hash, version, prev_block, merkle_root, time, bits, nonce, transactions=None,
                  height=None, confirmations=None, network=DEFAULT_NETWORK):
         """
@@ -59,15 +181,15 @@ class Block:
         :type network: str, Network
         """
 
-        self.block_hash = to_bytes(block_hash)
+        self.block_hash = _ensure_bytes(block_hash, 32)
         if isinstance(version, int):
             self.version = version.to_bytes(4, byteorder='big')
             self.version_int = version
         else:
-            self.version = to_bytes(version)
+            self.version = _ensure_bytes(version, 4)
             self.version_int = 0 if not self.version else int.from_bytes(self.version, 'big')
-        self.prev_block = to_bytes(prev_block)
-        self.merkle_root = to_bytes(merkle_root)
+        self.prev_block = _ensure_bytes(prev_block, 32)
+        self.merkle_root = _ensure_bytes(merkle_root, 32)
         self.time = time
         if not isinstance(time, int):
             self.time = int.from_bytes(time, 'big')
@@ -75,13 +197,13 @@ class Block:
             self.bits = bits.to_bytes(4, 'big')
             self.bits_int = bits
         else:
-            self.bits = to_bytes(bits)
+            self.bits = _ensure_bytes(bits, 4)
             self.bits_int = 0 if not self.bits else int.from_bytes(self.bits, 'big')
         if isinstance(nonce, int):
             self.nonce = nonce.to_bytes(4, 'big')
             self.nonce_int = nonce
         else:
-            self.nonce = to_bytes(nonce)
+            self.nonce = _ensure_bytes(nonce, 4)
             self.nonce_int = 0 if not self.nonce else int.from_bytes(self.nonce, 'big')
         self.transactions = transactions
         self.transactions_dict = []
@@ -99,6 +221,12 @@ class Block:
         self.total_in = 0
         self.total_out = 0
         self.size = 0
+        self.tx_sizes = None
+        self.tx_vsizes = None
+        self.tx_fees = None
+        self.tx_output_totals = None
+        self._target = 0
+        self._target_bits = None
         if self.transactions and len(self.transactions) and isinstance(self.transactions[0], Transaction) \
                 and self.version_int > 1:
             # first bytes of unlocking script of coinbase transaction contains block height (BIP0034)
@@ -123,15 +251,27 @@ class Block:
         """
         if not self.block_hash or not self.bits:
             return False
-        if int.from_bytes(self.block_hash, 'big') < self.target:
-            return True
-        return False
+        return int.from_bytes(self.block_hash, 'big') < self.target
+
+    def check_merkle_root(self):
+        """
+        Check if merkle root of this block corresponds with the merkle root calculated from the block's transactions.
+
+        Returns False if not all transactions are available.
+
+        :return bool:
+        """
+        if not self.merkle_root or not self.transactions or len(self.transactions) != self.tx_count:
+            return False
+        txids = [t.txid if isinstance(t, Transaction) else t for t in self.transactions]
+        return calc_merkle_root(txids) == self.merkle_root
 
     def __repr__(self):
         return "<Block(%s, %s, transactions: %s)>" % (self.block_hash.hex(), self.height, self.tx_count)
 
     @classmethod
-    def parse(cls, raw, block_hash=None, height=None, parse_transactions=False, limit=0, network=DEFAULT_NETWORK):
+    def parse(cls, raw, block_hash=None, height=None, parse_transactions=False, limit=0, network=DEFAULT_NETWORK,
+              verify_hash=True):
         """
         Create Block object from raw serialized block in bytes or BytesIO format. Wrapper for :func:`parse_bytesio`
 
@@ -155,20 +295,22 @@ class Block:
         :type limit: int
         :param network: Name of network
         :type network: str
+        :param verify_hash: Calculate block hash from header and compare it with provided block_hash. Set to False to skip hashing if block_hash is obtained from a trusted source. Default is True
+        :type verify_hash: bool
 
         :return Block:
         """
 
         if isinstance(raw, bytes):
-            b = cls.parse_bytesio(BytesIO(raw), block_hash, height, parse_transactions, limit, network)
+            b = cls.parse_bytesio(BytesIO(raw), block_hash, height, parse_transactions, limit, network, verify_hash)
             b.size = len(raw)
             return b
         else:
-            return cls.parse_bytesio(raw, block_hash, height, parse_transactions, limit, network)
+            return cls.parse_bytesio(raw, block_hash, height, parse_transactions, limit, network, verify_hash)
 
     @classmethod
     def parse_bytes(cls, raw_bytes, block_hash=None, height=None, parse_transactions=False, limit=0,
-                    network=DEFAULT_NETWORK):
+                    network=DEFAULT_NETWORK, verify_hash=True):
         """
         Create Block object from raw serialized block in bytes or BytesIO format. Wrapper for :func:`parse_bytesio`
 
@@ -192,18 +334,20 @@ class Block:
         :type limit: int
         :param network: Name of network
         :type network: str
+        :param verify_hash: Calculate block hash from header and compare it with provided block_hash. Set to False to skip hashing if block_hash is obtained from a trusted source. Default is True
+        :type verify_hash: bool
 
         :return Block:
         """
 
         raw_bytesio = BytesIO(raw_bytes)
-        b = cls.parse_bytesio(raw_bytesio, block_hash, height, parse_transactions, limit, network)
+        b = cls.parse_bytesio(raw_bytesio, block_hash, height, parse_transactions, limit, network, verify_hash)
         b.size = len(raw_bytes)
         return b
 
     @classmethod
     def parse_bytesio(cls, raw, block_hash=None, height=None, parse_transactions=False, limit=0,
-                      network=DEFAULT_NETWORK):
+                      network=DEFAULT_NETWORK, verify_hash=True):
         """
         Create Block object from raw serialized block in BytesIO format
 
@@ -227,24 +371,23 @@ class Block:
         :type limit: int
         :param network: Name of network
         :type network: str
+        :param verify_hash: Calculate block hash from header and compare it with provided block_hash. Set to False to skip hashing if block_hash is obtained from a trusted source. Default is True
+        :type verify_hash: bool
 
         :return Block:
         """
         block_header = raw.read(80)
-        block_hash_calc = double_sha256(block_header)[::-1]
-        if not block_hash:
-            block_hash = block_hash_calc
-        elif block_hash != block_hash_calc:
-            raise ValueError("Provided block hash does not correspond to calculated block hash %s" %
-                             block_hash_calc.hex())
-
-        raw.seek(0)
-        version = raw.read(4)[::-1]
-        prev_block = raw.read(32)[::-1]
-        merkle_root = raw.read(32)[::-1]
-        time = raw.read(4)[::-1]
-        bits = raw.read(4)[::-1]
-        nonce = raw.read(4)[::-1]
+        if len(block_header) != 80:
+            raise ValueError("Block header incomplete, expected 80 bytes but found %d" % len(block_header))
+        if verify_hash or not block_hash:
+            block_hash_calc = hashlib.sha256(hashlib.sha256(block_header).digest()).digest()[::-1]
+            if not block_hash:
+                block_hash = block_hash_calc
+            elif block_hash != block_hash_calc:
+                raise ValueError("Provided block hash does not correspond to calculated block hash %s" %
+                                 block_hash_calc.hex())
+
+        version, prev_block, merkle_root, time, bits, nonce = _BLOCK_HEADER.unpack(block_header)
         tx_count = read_varbyteint(raw)
         tx_start_pos = raw.tell()
         txs_data_size = raw.seek(0, 2)
@@ -264,7 +407,7 @@ class Block:
             raise ValueError("Number of found transactions %d is not equal to expected number %d" %
                              (len(transactions), tx_count))
 
-        block = cls(block_hash, version, prev_block, merkle_root, time, bits, nonce, transactions, height,
+        block = cls(block_hash, version, prev_block[::-1], merkle_root[::-1], time, bits, nonce, transactions, height,
                     network=network)
         block.txs_data = raw
         block.tx_count = tx_count
@@ -272,7 +415,8 @@ class Block:
 
     @classmethod
     @deprecated
-    def from_raw(cls, raw, block_hash=None, height=None, parse_transactions=False, limit=0, network=DEFAULT_NETWORK):  # pragma: no cover
+    def from_raw(cls, raw, block_hash=None, height=None, parse_transactions=False, limit=0, network=DEFAULT_NETWORK,
+                 verify_hash=True):  # pragma: no cover
         """
         Create Block object from raw serialized block in bytes.
 
@@ -296,41 +440,34 @@ class Block:
         :type limit: int
         :param network: Name of network
         :type network: str
+        :param verify_hash: Calculate block hash from header and compare it with provided block_hash. Set to False to skip hashing if block_hash is obtained from a trusted source. Default is True
+        :type verify_hash: bool
 
         :return Block:
         """
-        block_hash_calc = double_sha256(raw[:80])[::-1]
-        if not block_hash:
-            block_hash = block_hash_calc
-        elif block_hash != block_hash_calc:
-            raise ValueError("Provided block hash does not correspond to calculated block hash %s" %
-                             block_hash_calc.hex())
-
-        version = raw[0:4][::-1]
-        prev_block = raw[4:36][::-1]
-        merkle_root = raw[36:68][::-1]
-        time = raw[68:72][::-1]
-        bits = raw[72:76][::-1]
-        nonce = raw[76:80][::-1]
+        if len(raw) < 80:
+            raise ValueError("Block header incomplete, expected 80 bytes but found %d" % len(raw))
+        if verify_hash or not block_hash:
+            block_hash_calc = hashlib.sha256(hashlib.sha256(raw[:80]).digest()).digest()[::-1]
+            if not block_hash:
+                block_hash = block_hash_calc
+            elif block_hash != block_hash_calc:
+                raise ValueError("Provided block hash does not correspond to calculated block hash %s" %
+                                 block_hash_calc.hex())
+
+        version, prev_block, merkle_root, time, bits, nonce = _BLOCK_HEADER.unpack_from(raw)
         tx_count, size = varbyteint_to_int(raw[80:89])
-        txs_data = BytesIO(raw[80+size:])
-
-        # Parse coinbase transaction so we can extract extra information
-        # transactions = [Transaction.parse(txs_data, network=network)]
-        # txs_data = BytesIO(txs_data[transactions[0].size:])
-        # block_txs_data = txs_data.read()
-        txs_data_size = txs_data.seek(0, 2)
-        txs_data.seek(0)
+        # Wrap complete raw block and move cursor to first transaction, BytesIO shares the buffer without copying
+        txs_data = BytesIO(raw)
+        txs_data_size = len(raw)
+        txs_data.seek(80 + size)
         transactions = []
 
-        while parse_transactions and txs_data and txs_data.tell() < txs_data_size:
+        while parse_transactions and txs_data.tell() < txs_data_size:
             if limit != 0 and len(transactions) >= limit:
                 break
             t = Transaction.parse_bytesio(txs_data, strict=False)
             transactions.append(t)
-            # t = transaction_deserialize(txs_data, network=network, check_size=False)
-            # transactions.append(t)
-            # txs_data = txs_data[t.size:]
             # TODO: verify transactions, need input value from previous txs
             # if verify and not t.verify():
             #     raise ValueError("Could not verify transaction %s in block %s" % (t.txid, block_hash))
@@ -339,7 +476,7 @@ class Block:
             raise ValueError("Number of found transactions %d is not equal to expected number %d" %
                              (len(transactions), tx_count))
 
-        block = cls(block_hash, version, prev_block, merkle_root, time, bits, nonce, transactions, height,
+        block = cls(block_hash, version, prev_block[::-1], merkle_root[::-1], time, bits, nonce, transactions, height,
                     network=network)
         block.txs_data = txs_data
         block.tx_count = tx_count
@@ -361,6 +498,27 @@ class Block:
             self.transactions.append(t)
             n += 1
 
+    def transaction_offsets(self, limit=0):
+        """
+        Get offset and size of the raw transactions in txs_data which are not parsed yet. Does not create Transaction
+        objects and does not change the txs_data position, so it can be used to quickly find transaction boundaries,
+        for instance to calculate transaction IDs.
+
+        :param limit: Maximum number of transactions to scan. Default is 0: scan all unparsed transactions
+        :type limit: int
+
+        :return list of (int, int): List of tuples with offset in txs_data and size of each transaction
+        """
+        if not self.txs_data:
+            return []
+        count = self.tx_count - len(self.transactions)
+        if limit:
+            count = min(count, limit)
+        pos = self.txs_data.tell()
+        raw = self.txs_data.read()
+        self.txs_data.seek(pos)
+        return [(offset + pos, size) for offset, size in _scan_tx_offsets(raw, 0, count)]
+
     def parse_transactions_dict(self):
         """
         Parse raw transactions from Block, if transaction data is available in txs_data attribute. Returns a list of
@@ -372,13 +530,15 @@ class Block:
         :return:
         """
         transactions_dict = []
-        txs_data_orig = deepcopy(self.txs_data)
-        while self.txs_data and len(self.transactions) < self.tx_count:
+        if not self.txs_data:
+            return transactions_dict
+        txs_data_pos = self.txs_data.tell()
+        while len(self.transactions) < self.tx_count:
             tx = self.parse_transaction_dict()
             if not tx:
                 break
             transactions_dict.append(tx)
-        self.txs_data = txs_data_orig
+        self.txs_data.seek(txs_data_pos)
         return transactions_dict
             
     def parse_transaction(self):
@@ -402,29 +562,29 @@ class Block:
         :return Transaction:
         """
         if self.txs_data and len(self.transactions) < self.tx_count:
+            pos_start = self.txs_data.tell()
             tx = {'height': self.height, 'coinbase': False, 'flag': None, 'witness_type': 'legacy',
                   'version': self.txs_data.read(4)[::-1]}
             if not tx['version']:
                 return False
-            raw_flag = b''
             if self.txs_data.read(1) == b'\0':
                 flag = self.txs_data.read(1)
                 if flag == b'\1':
                     tx['witness_type'] = 'segwit'
-                raw_flag += b'\0\1'
             else:
                 self.txs_data.seek(-1, 1)
 
-            n_inputs, raw_n_inputs = read_varbyteint_return(self.txs_data)
+            # Raw transaction and txid data are read back from the stream afterwards using these positions
+            pos_inputs = self.txs_data.tell()
+            n_inputs = read_varbyteint(self.txs_data)
 
             inputs = []
-            inputs_raw = b''
             for n in range(0, n_inputs):
                 inp = {'prev_txid': self.txs_data.read(32)[::-1]}
                 if len(inp['prev_txid']) != 32:
                     raise Exception("Input transaction hash not found. Probably malformed self.txs_data transaction")
                 inp['output_n'] = self.txs_data.read(4)[::-1]
-                unlocking_script_size, unlocking_script_size_raw = read_varbyteint_return(self.txs_data)
+                unlocking_script_size = read_varbyteint(self.txs_data)
                 inp['unlocking_script'] = self.txs_data.read(unlocking_script_size)
                 inp['inp_type'] = 'legacy'
                 if tx['witness_type'] == 'segwit' and not unlocking_script_size:
@@ -434,50 +594,47 @@ class Block:
                 if inp['prev_txid'] == 32 * b'\0':
                     tx['coinbase'] = True
                 inputs.append(inp)
-                inputs_raw += \
-                    inp['prev_txid'][::-1] + inp['output_n'][::-1] + unlocking_script_size_raw + \
-                    inp['unlocking_script'] + inp['sequence_number']
             tx['inputs'] = inputs
 
             outputs = []
-            outputs_raw = b''
-            n_outputs, raw_n_outputs = read_varbyteint_return(self.txs_data)
+            n_outputs = read_varbyteint(self.txs_data)
             tx['output_total'] = 0
             for n in range(0, n_outputs):
                 outp = {}
                 outp_value = self.txs_data.read(8)
-                outp['value'] = int.from_bytes(outp_value[::-1], 'big')
-                lock_script_size, lock_script_size_raw = read_varbyteint_return(self.txs_data)
+                if len(outp_value) != 8:
+                    raise Exception("Output value not found. Probably malformed self.txs_data transaction")
+                outp['value'] = _U64LE.unpack(outp_value)[0]
+                lock_script_size = read_varbyteint(self.txs_data)
                 outp['lock_script'] = self.txs_data.read(lock_script_size)
                 outputs.append(outp)
                 outp['output_n'] = n
                 tx['output_total'] += outp['value']
-                outputs_raw += outp_value + lock_script_size_raw + outp['lock_script']
             if not outputs:
                 raise Exception("Error no outputs found in this transaction")
             tx['outputs'] = outputs
 
-            witnesses_raw = b''
+            pos_witnesses = self.txs_data.tell()
             if tx['witness_type'] == 'segwit':
                 for n in range(0, len(inputs)):
-                    n_items, raw_n_items = read_varbyteint_return(self.txs_data)
-                    witnesses_raw += raw_n_items
+                    n_items = read_varbyteint(self.txs_data)
                     if not n_items:
                         continue
                     # script = Script()
                     inputs[n]['witnesses'] = []
                     for m in range(0, n_items):
-                        item_size, raw_item_size = read_varbyteint_return(self.txs_data)
-                        witnesses_raw += raw_item_size
+                        item_size = read_varbyteint(self.txs_data)
                         witness = self.txs_data.read(item_size)
-                        witnesses_raw += witness
                         inputs[n]['witnesses'].append(witness)
 
             tx_locktime = self.txs_data.read(4)
-            tx['locktime'] = int.from_bytes(tx_locktime[::-1], 'big')
-            tx['rawtx'] = tx['version'][::-1] + raw_flag + raw_n_inputs + inputs_raw + raw_n_outputs + outputs_raw + \
-                          witnesses_raw + tx_locktime
-            tx['txid'] = double_sha256(tx['version'][::-1] + raw_n_inputs + inputs_raw + raw_n_outputs + outputs_raw
+            if len(tx_locktime) != 4:
+                raise Exception("Transaction locktime not found. Probably malformed self.txs_data transaction")
+            tx['locktime'] = _U32LE.unpack(tx_locktime)[0]
+            pos_end = self.txs_data.tell()
+            self.txs_data.seek(pos_start)
+            tx['rawtx'] = self.txs_data.read(pos_end - pos_start)
+            tx['txid'] = double_sha256(tx['rawtx'][:4] + tx['rawtx'][pos_inputs - pos_start:pos_witnesses - pos_start]
                                        + tx_locktime)[::-1]
             tx['size'] = len(tx['rawtx'])
             # TODO: tx['vsize'] = len(tx['rawtx'])
@@ -516,9 +673,16 @@ class Block:
         """
         if not self.bits:
             return 0
-        exponent = self.bits[0]
-        coefficient = int.from_bytes(b'\x00' + self.bits[1:], 'big')
-        return coefficient * 256 ** (exponent - 3)
+        # Cache target, it is only recalculated if bits are changed
+        if self._target_bits != self.bits:
+            exponent = self.bits[0]
+            coefficient = int.from_bytes(b'\x00' + self.bits[1:], 'big')
+            if exponent >= 3:
+                self._target = coefficient << (8 * (exponent - 3))
+            else:
+                self._target = coefficient >> (8 * (3 - exponent))
+            self._target_bits = self.bits
+        return self._target
 
     @property
     def target_hex(self):
@@ -529,7 +693,7 @@ class Block:
         """
         if not self.bits:
             return ''
-        return hex(int(self.target))[2:].zfill(64)
+        return '%064x' % self.target
 
     @property
     def difficulty(self):
@@ -548,7 +712,7 @@ class Block:
         """
         if not self.bits:
             return 0
-        return 0xffff * 256 ** (0x1d - 3) / self.target
+        return _DIFF_1_TARGET / self.target
 
     def serialize(self):
         """
@@ -570,19 +734,12 @@ class Block:
         """
         if len(self.transactions) != self.tx_count or len(self.transactions) < 1:
             raise ValueError("Block contains incorrect number of transactions, can not serialize")
-        rb = self.version[::-1]
-        rb += self.prev_block[::-1]
-        rb += self.merkle_root[::-1]
-        rb += self.time.to_bytes(4, 'little')
-        rb += self.bits[::-1]
-        rb += self.nonce[::-1]
-        if len(rb) != 80:
+        header = b''.join([self.version[::-1], self.prev_block[::-1], self.merkle_root[::-1],
+                           _U32LE.pack(self.time), self.bits[::-1], self.nonce[::-1]])
+        if len(header) != 80:
             raise ValueError("Missing or incorrect length of 1 of the block header variables: version, prev_block, "
                              "merkle_root, time, bits or nonce.")
-        rb += int_to_varbyteint(len(self.transactions))
-        for t in self.transactions:
-            rb += t.raw()
-        return rb
+        return b''.join([header, int_to_varbyteint(len(self.transactions))] + [t.raw() for t in self.transactions])
 
     @property
     def version_bin(self):
@@ -598,7 +755,7 @@ class Block:
 
         :return str:
         """
-        return bin(self.version_int)[2:].zfill(32)
+        return format(self.version_int, '032b')
 
     def version_bips(self):
         """
@@ -619,31 +776,18 @@ class Block:
 
         :return list of str:
         """
+        version = self.version_int
         bips = []
-        if self.version_int >> 29 == 0b001 and self.height >= 407021:
+        if version >> 29 == 0b001 and self.height >= 407021:
             bips.append('BIP9')
-            if self.version_int >> 0 & 1 == 1:
-                bips.append('BIP68')   # BIP112 (CHECKSEQUENCEVERIFY), BIP113 - Relative lock-time using consensus-enforced sequence numbers
-            if self.version_int >> 1 & 1 == 1:
-                bips.append('BIP141')  # BIP143, BIP147 (Segwit)
-            if self.version_int >> 4 & 1 == 1:
-                bips.append('BIP91')   # Segwit?
-            if self.version_int == 0x30000000:
+            bips += [bip for bit, bip in _BIP9_BITS if version >> bit & 1]
+            if version == 0x30000000:
                 bips.append('BIP109')  # Increase block size 2MB (rejected)
             mask = 0x1fffe000
-            if self.version_int & mask and self.height >= 500000:
+            if version & mask and self.height >= 500000:
                 bips.append('BIP310')   # version-rolling
-        elif self.height < 500000:
-            if self.version_int == 2:
-                bips.append('BIP34')    # Version 2: Block Height in Coinbase
-            if self.version_int == 3:
-                bips.append('BIP66')    # Version 3: Strict DER signatures
-            if self.version_int == 4:
-                bips.append('BIP65')    # Version 4: Introduce CHECKLOCKTIMEVERIFY
-            if self.version_int == 0x30000000:
-                bips.append('BIP109')   # Increase block size 2MB (rejected)
-            if self.version_int == 0x20000007:
-                bips.append('BIP101')   # Increase block size 8MB (rejected)
+        elif self.height < 500000 and version in _LEGACY_VERSION_BIPS:
+            bips.append(_LEGACY_VERSION_BIPS[version])
 
         return bips
 
@@ -653,3 +797,31 @@ class Block:
         for t in self.transactions:
             self.total_in += sum([i.value for i in t.inputs])
             self.total_out += sum([o.value for o in t.outputs])
+
+    def update_tx_arrays(self):
+        """
+        Store sizes, virtual sizes, fees and output totals of the transactions in this block in contiguous numpy
+        arrays, with one item per transaction in the same order as the transactions list. Fees are stored as floats,
+        with *nan* for unknown fees, i.e. for transactions parsed from a raw block without input values. Raises a ValueError if the transactions list contains items which are not Transaction objects, such as
+        transaction IDs.
+
+        Use these arrays for analysis of many transactions, i.e. *b.tx_sizes.mean()* or *np.nansum(b.tx_fees)*, to
+        avoid looping over Transaction objects.
+
+        >>> from bitcoinlib.services.services import Service
+        >>> srv = Service()
+        >>> b = srv.getblock(0)
+        >>> b.update_tx_arrays()
+        >>> b.tx_sizes
+        array([204])
+
+        :return:
+        """
+        txs = self.transactions
+        if not all(isinstance(t, Transaction) for t in txs):
+            raise ValueError("Transactions of this block must be parsed as Transaction objects to create arrays")
+        self.tx_sizes = np.fromiter((t.size or 0 for t in txs), dtype=np.int64, count=len(txs))
+        self.tx_vsizes = np.fromiter((t.vsize or 0 for t in txs), dtype=np.int64, count=len(txs))
+        self.tx_fees = np.fromiter((np.nan if t.fee is None else t.fee for t in txs), dtype=np.float64,
+                                   count=len(txs))
+        self.tx_output_totals = np.fromiter((t.output_total for t in txs), dtype=np.int64, count=len(txs))
@@ -20,6 +20,7 @@
 
 import unittest
 import pickle
+import tempfile
 from bitcoinlib.blocks import *
 from tests.test_custom import CustomAssertions
 
@@ -92,6 +93,10 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
                          'target': '0000000000006a93b30000000000000000000000000000000000000000000000',
                          'difficulty': 157416.40184364893}
         self.assertDictEqualExt(b.as_dict(), expected_dict)
+        self.assertEqual(b.target, 0x6a93b30000000000000000000000000000000000000000000000)
+        b.bits = bytes.fromhex('1d00ffff')
+        self.assertEqual(b.target_hex, '00000000ffff0000000000000000000000000000000000000000000000000000')
+        self.assertEqual(b.difficulty, 1)
 
     def test_blocks_parse_block_and_transactions(self):
         b = Block.parse(self.rb250000, parse_transactions=True)
@@ -105,12 +110,18 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
         self.assertEqual(b.nonce_int, 0x917661)
         self.assertEqual(int(b.difficulty), 37392766)
         self.assertEqual(b.target, 720982641204331278205950312227594303241470815982254303477760)
+        b.bits = (0x02008000).to_bytes(4, 'big')
+        self.assertEqual(b.target, 0x80)
+        b.bits = (0x01800000).to_bytes(4, 'big')
+        self.assertEqual(b.target, 0x80)
+        b.bits = (0x1972dbf2).to_bytes(4, 'big')
         self.assertEqual(b.tx_count, 156)
         self.assertEqual(b.transactions[0].txid, '7ae2ab185a6e501753f6e29e5b6a98ba040098acb7c11ffed9430f22ed5263a3')
         self.assertEqual(b.transactions[49].txid, '3b6d97f107cba804270f4d22fafda3295b3bfb735366da6c1473157cc94a5f7c')
         self.assertEqual(b.transactions[122].txid, 'a5cc9bd850b6eedc3e466b3e0f5c85fb640de0a3537259eb0cae761d0a4f78b4')
         self.assertEqual(b.transactions[155].txid, 'e3d6cb87bd37ca53509cdc9ecdabf82ef966d9b25a2598b7de87c8173beb40d5')
         self.assertTrue(b.check_proof_of_work())
+        self.assertTrue(b.check_merkle_root())
 
     def test_blocks_parse_block_exceptions(self):
         # self.assertRaisesRegex(ValueError, "Specified block height is different than calculated block height "
@@ -120,6 +131,11 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
                                            "000000000000003887df1f29024b06fc2200b55f8af8f35453d7be294df2d214",
                                Block.parse, self.rb250000, parse_transactions=False,
                                block_hash='000000000000003887df1f29024b06fc2200b55f8af8f35453d7be294df2d214')
+        block_hash = bytes.fromhex('000000000000003887df1f29024b06fc2200b55f8af8f35453d7be294df2d214')
+        self.assertEqual(Block.parse(self.rb250000, block_hash=block_hash).block_hash, block_hash)
+        self.assertEqual(Block.parse(self.rb250000, block_hash=32 * b'\x01', verify_hash=False).block_hash,
+                         32 * b'\x01')
+        self.assertEqual(Block.parse_bytes(self.rb250000, verify_hash=False).block_hash, block_hash)
         incomplete_raw = '010000008a27a4849da1fea18e8f062e7948eb839ca3665d0b129d8095e1ea1a0000000049460f6df908fdf763' \
                          '4a5e73a984cf49e0555ba5066d52ffacaf5c892b2d3aeeeca7c04b15112a1cf36e610303010000000100000000' \
                          '00000000000000000000000000000000000000000000000000000000ffffffff080415112a1c02cc00ffffffff' \
@@ -133,6 +149,8 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
                          '0100e40b54020000001976a914b5cd7aaed869cd5ccb45868e8666e7e934a2373688ac00000000'
         self.assertRaisesRegex(ValueError, "Number of found transactions 2 is not equal to expected number 3",
                                Block.parse, to_bytes(incomplete_raw), parse_transactions=True)
+        self.assertRaisesRegex(ValueError, "Block header incomplete, expected 80 bytes but found 79",
+                               Block.parse, self.rb250000[:79])
 
     def test_blocks_parse_block_and_transactions_2(self):
         b = Block.parse(self.rb330000, parse_transactions=True, limit=5)
@@ -157,10 +175,77 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
         self.assertEqual(len(b.transactions), 81)
         self.assertEqual(b.transactions[80].txid, '7c8483c890942334ecb73db3802f7571b06047b5c15febe3bad11e460065709b')
 
+    def test_block_merkle_root(self):
+        b = Block.parse(self.rb330000, parse_transactions=True)
+        self.assertEqual(calc_merkle_root([t.txid for t in b.transactions]), b.merkle_root)
+        self.assertTrue(b.check_merkle_root())
+        b.transactions = b.transactions[:80]
+        self.assertFalse(b.check_merkle_root())
+        self.assertEqual(calc_merkle_root([]), b'')
+
+    def test_block_transaction_offsets(self):
+        b = Block.parse_bytes(self.rb722010, parse_transactions=True, limit=10)
+        offsets = b.transaction_offsets()
+        self.assertEqual(len(offsets), 2658)
+        self.assertEqual(offsets[-1][0] + offsets[-1][1], len(self.rb722010))
+        self.assertEqual(len(b.transaction_offsets(5)), 5)
+        offset, size = offsets[0]
+        b.parse_transactions(1)
+        self.assertEqual(b.transactions[10].rawtx, self.rb722010[offset:offset + size])
+        self.assertEqual(b.transactions[10].size, size)
+        self.assertEqual(b.txs_data.tell(), offset + size)
+
+        # Block parsed from a file stream instead of BytesIO
+        with tempfile.TemporaryFile() as f:
+            f.write(self.rb722010)
+            f.seek(0)
+            b = Block.parse(f, parse_transactions=True, limit=10)
+            self.assertListEqual(b.transaction_offsets(), offsets)
+            self.assertEqual(f.tell(), offsets[0][0])
+
+        b = Block.parse_bytes(self.rb250000)
+        offsets = b.transaction_offsets()
+        self.assertEqual(len(offsets), 156)
+        self.assertEqual(offsets[-1][0] + offsets[-1][1], len(self.rb250000))
+        self.assertRaisesRegex(ValueError, "Transaction data incomplete",
+                               Block.parse_bytes(self.rb250000[:-10]).transaction_offsets)
+        # Oversized input count should not make the scan loop past the end of the data
+        raw_malformed = self.rb250000[:80] + b'\x01' + b'\x01\x00\x00\x00' + bytes.fromhex('feffffff7f') + 20 * b'\x00'
+        self.assertRaisesRegex(ValueError, "Transaction data incomplete",
+                               Block.parse_bytes(raw_malformed).transaction_offsets)
+
+    def test_block_update_tx_arrays(self):
+        b = Block.parse(self.rb250000, parse_transactions=True)
+        b.transactions[1].fee = 50000
+        b.update_tx_arrays()
+        self.assertEqual(len(b.tx_sizes), 156)
+        self.assertEqual(b.tx_sizes.sum() + 81, len(self.rb250000))
+        self.assertEqual(b.tx_output_totals[0], 2511190100)
+        self.assertEqual(b.tx_output_totals.sum(), sum([t.output_total for t in b.transactions]))
+        self.assertEqual(len(b.tx_fees), 156)
+        self.assertEqual(b.tx_fees.dtype, np.float64)
+        self.assertEqual(b.tx_fees[1], 50000)
+        # Fees of transactions parsed from raw block are unknown
+        self.assertTrue(np.isnan(b.tx_fees[0]))
+        self.assertEqual(np.count_nonzero(np.isnan(b.tx_fees)), 155)
+        self.assertTrue(np.isnan(b.tx_fees.sum()))
+        self.assertEqual(np.nansum(b.tx_fees), 50000)
+        b.transactions[2] = b.transactions[2].txid
+        self.assertRaisesRegex(ValueError, "Transactions of this block must be parsed as Transaction objects",
+                               b.update_tx_arrays)
+
     def test_block_serialize(self):
         b = Block.parse(self.rb330000, parse_transactions=True)
         rb_ser = b.serialize()
         self.assertEqual(rb_ser, self.rb330000)
+        b.nonce = b'\x00\x00\x00\x01'
+        b.bits = bytes.fromhex('1d00ffff')
+        rb_ser = b.serialize()
+        self.assertEqual(rb_ser[72:80], bytes.fromhex('ffff001d01000000'))
+        self.assertEqual(rb_ser[80:], self.rb330000[80:])
+        b.prev_block = b.prev_block[1:]
+        self.assertRaisesRegex(ValueError, "Missing or incorrect length of 1 of the block header variables",
+                               b.serialize)
 
     def test_block_parse_block_629999(self):
         b = Block.parse_bytesio(BytesIO(self.rb629999), parse_transactions=True, limit=100)
@@ -184,6 +269,17 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
         self.assertEqual(b.block_hash.hex(), '000000000000000000007b2561b9d69cccbb06df8faed054432f63b96ee7d3dc')
         self.assertEqual(len(b.transactions), 3083)
 
+    def test_block_create_raw_bytes(self):
+        # Raw hashes which only contain hexadecimal characters should not be unhexlified
+        block_hash = b'00000000000000000000000000000000'
+        b = Block(block_hash, b'1234', 32 * b'\x00', b'abcdef0123456789abcdef0123456789', 1305042430, b'\x1d\x00\xff\xff',
+                  b'1234')
+        self.assertEqual(b.block_hash, block_hash)
+        self.assertEqual(b.version, b'1234')
+        self.assertEqual(b.merkle_root, b'abcdef0123456789abcdef0123456789')
+        self.assertEqual(b.nonce_int, 0x31323334)
+        self.assertEqual(b.bits_int, 0x1d00ffff)
+
     def test_block_incomplete(self):
         # block_hash, version, prev_block, merkle_root, time, bits, nonce
         b = Block('000000000000000000024bead8df69990852c202db0e0097c1a12ea637d7e96d', 0x30000000,
@@ -209,3 +305,8 @@ class TestBlocks(unittest.TestCase, CustomAssertions):
         for tx in tx_dict:
             assert(tx['txid'].hex() == b.transactions[i].txid)
             i += 1
+
+        b = Block.parse_bytes(self.rb250000[:-2])
+        self.assertRaisesRegex(Exception, "Transaction locktime not found", b.parse_transactions_dict)
+        b = Block.parse_bytes(self.rb250000[:150])
+        self.assertRaisesRegex(Exception, "Output value not found", b.parse_transactions_dict)